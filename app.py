@@ -5,15 +5,24 @@ Professional, classy, interactive interface
 
 import streamlit as st
 import asyncio
+import hashlib
+import json
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from orchestrator import CollegeAssistantOrchestrator
-from ui.styles import get_custom_css, get_chat_message_html, get_tool_badge_html, get_metric_card_html
+from ui import styles
+from ui.styles import get_chat_message_html, get_tool_badge_html, get_metric_card_html
+
+# The stylesheet is large and never changes, so keep it across reruns
+get_custom_css = st.cache_data(styles.get_custom_css)
 
 # Page Configuration
 st.set_page_config(
@@ -27,6 +36,100 @@ st.set_page_config(
 st.markdown(get_custom_css(), unsafe_allow_html=True)
 
 
+# Static HTML blocks
+WELCOME_CARD_HTML = """
+<div class="glass-card">
+    <h3>👋 Welcome!</h3>
+    <p>I can help you with:</p>
+    <ul>
+        <li>🔍 <strong>Employee Information:</strong> Search by name, department, or ID</li>
+        <li>📢 <strong>Announcements:</strong> Holidays, events, policy updates</li>
+        <li>📚 <strong>Policy Questions:</strong> Leave, salary, HR policies</li>
+        <li>🔗 <strong>Complex Queries:</strong> Combine multiple data sources</li>
+    </ul>
+    <p>Try asking: <em>"What are the upcoming holidays?"</em></p>
+</div>
+"""
+
+SYSTEM_INFO_HTML = """
+<div class="glass-card">
+    <p><strong>Model:</strong> llama-3.3-70b-versatile</p>
+    <p><strong>Provider:</strong> Groq</p>
+    <p><strong>Servers:</strong> 3 MCP</p>
+    <p><strong>Tools:</strong> 9 Available</p>
+</div>
+"""
+
+DATABASE_SERVER_CARD_HTML = """
+<div class="glass-card">
+    <h3>💾 Database Server</h3>
+    <p><strong>Purpose:</strong> Employee records</p>
+    <p><strong>Storage:</strong> SQLite</p>
+    <p><strong>Tools:</strong> 4</p>
+    <ul>
+        <li>get_employee</li>
+        <li>search_employees</li>
+        <li>get_by_department</li>
+        <li>get_all_employees</li>
+    </ul>
+</div>
+"""
+
+FILESYSTEM_SERVER_CARD_HTML = """
+<div class="glass-card">
+    <h3>📁 Filesystem Server</h3>
+    <p><strong>Purpose:</strong> Announcements</p>
+    <p><strong>Storage:</strong> Text files</p>
+    <p><strong>Tools:</strong> 3</p>
+    <ul>
+        <li>list_announcements</li>
+        <li>read_announcement</li>
+        <li>search_announcements</li>
+    </ul>
+</div>
+"""
+
+RAG_SERVER_CARD_HTML = """
+<div class="glass-card">
+    <h3>🧠 RAG Server</h3>
+    <p><strong>Purpose:</strong> Policy docs</p>
+    <p><strong>Storage:</strong> ChromaDB</p>
+    <p><strong>Tools:</strong> 2</p>
+    <ul>
+        <li>query_policies</li>
+        <li>get_policy_summary</li>
+    </ul>
+</div>
+"""
+
+ORCHESTRATION_FLOW_HTML = """
+    <div class="glass-card">
+        <pre>
+User Query
+    ↓
+Groq LLM (llama-3.3-70b-versatile)
+    ↓
+Function Calling & Tool Selection
+    ↓
+┌──────────────┬─────────────────┬──────────────┐
+│   Database   │   Filesystem    │     RAG      │
+│  MCP Server  │   MCP Server    │  MCP Server  │
+└──────────────┴─────────────────┴──────────────┘
+    ↓
+Results Aggregation
+    ↓
+Natural Language Response
+        </pre>
+    </div>
+"""
+
+FOOTER_HTML = """
+<div style="text-align: center; color: #808080; font-size: 0.9rem;">
+    Made with ❤️ using RAG + MCP • Powered by Groq (llama-3.3-70b-versatile)
+</div>
+"""
+
+
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -34,6 +137,9 @@ if "messages" not in st.session_state:
 if "orchestrator" not in st.session_state:
     st.session_state.orchestrator = None
     
+if "history" not in st.session_state:
+    st.session_state.history = []
+    
 if "query_count" not in st.session_state:
     st.session_state.query_count = 0
     
@@ -41,6 +147,12 @@ if "tools_used" not in st.session_state:
     st.session_state.tools_used = []
 
 
+@st.cache_resource
+def get_orchestrator(api_key: str) -> CollegeAssistantOrchestrator:
+    """Create one orchestrator (and its MCP servers) shared by all sessions."""
+    return CollegeAssistantOrchestrator(api_key)
+
+
 def initialize_orchestrator():
     """Initialize the orchestrator with API key."""
     groq_api_key = os.getenv("GROQ_API_KEY")
@@ -52,7 +164,7 @@ def initialize_orchestrator():
     
     try:
         with st.spinner("🔧 Initializing AI Assistant..."):
-            st.session_state.orchestrator = CollegeAssistantOrchestrator(groq_api_key)
+            st.session_state.orchestrator = get_orchestrator(groq_api_key)
         st.success("✅ Assistant ready!")
         return True
     except Exception as e:
@@ -60,107 +172,134 @@ def initialize_orchestrator():
         return False
 
 
-async def process_query_async(query: str):
-    """Process user query asynchronously."""
-    return await st.session_state.orchestrator.process_query(query, verbose=False)
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start one long-lived event loop, on a background thread, for all sessions."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
 
 
-def process_query(query: str):
-    """Wrapper to run async query in sync context."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        response = loop.run_until_complete(process_query_async(query))
-        return response
-    finally:
-        loop.close()
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
 
 
-# Sidebar
-with st.sidebar:
-    st.markdown("# 🤖 RAG-MCP Assistant")
-    st.markdown("---")
+class ResponseCache:
+    """Thread-safe TTL/LRU cache of final answers."""
     
-    # Stats Section
-    st.markdown("### 📊 Session Stats")
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(get_metric_card_html("Queries", str(st.session_state.query_count), "💬"), unsafe_allow_html=True)
-    with col2:
-        st.markdown(get_metric_card_html("Tools", str(len(set(st.session_state.tools_used))), "🔧"), unsafe_allow_html=True)
+    def __init__(self, ttl: float = 300, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
     
-    st.markdown("---")
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
     
-    # System Info
-    st.markdown("### ⚙️ System Info")
-    st.markdown("""
-    <div class="glass-card">
-        <p><strong>Model:</strong> llama-3.3-70b-versatile</p>
-        <p><strong>Provider:</strong> Groq</p>
-        <p><strong>Servers:</strong> 3 MCP</p>
-        <p><strong>Tools:</strong> 9 Available</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Quick Actions
-    st.markdown("### ⚡ Quick Actions")
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Create one response cache shared by all sessions."""
+    return ResponseCache(ttl=300, max_entries=256)
+
+
+def history_key(history) -> str:
+    """Digest of the conversation so far, used as part of the cache key."""
+    return hashlib.blake2b(json.dumps(history, sort_keys=True).encode()).hexdigest()
+
+
+def last_turn(history) -> list:
+    """Messages of the latest turn, starting with its user message."""
+    for i in range(len(history) - 1, -1, -1):
+        if history[i]["role"] == "user":
+            return history[i:]
+    return []
+
+
+def stream_query(query: str, tools_used: list):
+    """
+    Wrapper to consume the async answer stream in sync context.
     
-    if st.button("🔄 Clear Chat", use_container_width=True):
-        st.session_state.messages = []
-        if st.session_state.orchestrator:
-            st.session_state.orchestrator.reset_conversation()
-        st.rerun()
+    Answers are cached per (query, conversation so far), so repeated
+    questions such as the sample queries skip the LLM and tool calls.
+    The names of the tools used are appended to tools_used.
+    """
+    history = st.session_state.history
+    cache = get_response_cache()
+    key = (query, history_key(history))
     
-    st.markdown("---")
+    cached = cache.get(key)
+    if cached is not None:
+        response, tools, new_messages = cached
+        tools_used.extend(tools)
+        history.extend(new_messages)
+        st.session_state.orchestrator.trim_history(history)
+        yield response
+        return
     
-    # Sample Queries
-    st.markdown("### 💡 Try These")
-    sample_queries = [
-        "What holidays are coming up?",
-        "Who works in Engineering?",
-        "What's the sick leave policy?",
-        "Search for John",
-        "Team events in 2025?"
-    ]
+    tools_before = len(tools_used)
+    chunks = st.session_state.orchestrator.stream_query(query, history, verbose=False, tools_used=tools_used)
+    parts = []
+    try:
+        while True:
+            try:
+                part = run_async(chunks.__anext__())
+            except StopAsyncIteration:
+                break
+            parts.append(part)
+            yield part
+    finally:
+        run_async(chunks.aclose())
     
-    for query in sample_queries:
-        if st.button(query, key=f"sample_{query}", use_container_width=True):
-            st.session_state.pending_query = query
+    # Cache the answer together with its tools and the messages it added
+    cache.set(key, ("".join(parts), tools_used[tools_before:], last_turn(history)))
 
 
-# Main Content Area
-st.markdown("# 🎓 RAG-MCP Intelligent Assistant")
-st.markdown("### Ask me anything about employees, policies, or announcements!")
-
-# Initialize orchestrator if not done
-if st.session_state.orchestrator is None:
-    initialize_orchestrator()
+@st.fragment
+def render_query_history():
+    """Render each question with its answer, newest first."""
+    # Pair every user message with the assistant reply that follows it
+    pairs = []
+    for msg in st.session_state.messages:
+        if msg["role"] == "user":
+            pairs.append((msg, None))
+        elif pairs and pairs[-1][1] is None:
+            pairs[-1] = (pairs[-1][0], msg)
+    
+    for number, (question, answer) in reversed(list(enumerate(pairs, 1))):
+        with st.expander(f"Query {number}: {question['content'][:50]}..."):
+            st.markdown(f"**Question:** {question['content']}")
+            if answer is not None:
+                st.markdown(f"**Answer:** {answer['content'][:200]}...")
 
-# Tabs for different sections
-tab1, tab2, tab3 = st.tabs(["💬 Chat", "🔍 System Details", "📈 Analytics"])
 
-with tab1:
+@st.fragment
+def chat_tab():
+    """Render the chat tab; submitting the form reruns only this fragment."""
     # Chat Interface
     chat_container = st.container()
     
     # Display chat messages
     with chat_container:
         if not st.session_state.messages:
-            st.markdown("""
-            <div class="glass-card">
-                <h3>👋 Welcome!</h3>
-                <p>I can help you with:</p>
-                <ul>
-                    <li>🔍 <strong>Employee Information:</strong> Search by name, department, or ID</li>
-                    <li>📢 <strong>Announcements:</strong> Holidays, events, policy updates</li>
-                    <li>📚 <strong>Policy Questions:</strong> Leave, salary, HR policies</li>
-                    <li>🔗 <strong>Complex Queries:</strong> Combine multiple data sources</li>
-                </ul>
-                <p>Try asking: <em>"What are the upcoming holidays?"</em></p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(WELCOME_CARD_HTML, unsafe_allow_html=True)
         
         for message in st.session_state.messages:
             is_user = message["role"] == "user"
@@ -211,24 +350,13 @@ with tab1:
             # Show thinking indicator
             with st.spinner("🤔 Thinking..."):
                 try:
-                    # Process query - but we need to track tools used
-                    # Store the conversation history before processing
-                    hist_before = len(st.session_state.orchestrator.conversation_history)
-                    
-                    response = process_query(user_input)
-                    
-                    # Extract tools used from conversation history
+                    # Stream the answer into the chat as it is generated
                     tools_in_this_query = []
-                    hist_after = st.session_state.orchestrator.conversation_history
+                    with chat_container:
+                        response = st.write_stream(stream_query(user_input, tools_in_this_query))
                     
-                    # Find the assistant message with tool_calls
-                    for msg in hist_after[hist_before:]:
-                        if msg.get("role") == "assistant" and "tool_calls" in msg:
-                            for tc in msg["tool_calls"]:
-                                tool_name = tc["function"]["name"]
-                                tools_in_this_query.append(tool_name)
-                                # Add to global tools used list
-                                st.session_state.tools_used.append(tool_name)
+                    # Add to global tools used list
+                    st.session_state.tools_used.extend(tools_in_this_query)
                     
                     # Update stats
                     st.session_state.query_count += 1
@@ -247,9 +375,80 @@ with tab1:
             # Clear processing flag
             del st.session_state.processing
             
-            # Rerun to update UI
+            # Rerun the whole app so the sidebar stats and Analytics tab pick
+            # up the new message. This also covers sidebar sample queries,
+            # which arrive in a full run where a fragment-scoped rerun is not
+            # allowed.
             st.rerun()
 
+
+def clear_chat():
+    """Start a new conversation (button callback)."""
+    st.session_state.messages = []
+    st.session_state.history = []
+
+
+def queue_query(query: str):
+    """Hand a sample query to the chat tab (button callback)."""
+    st.session_state.pending_query = query
+
+
+# Sidebar
+with st.sidebar:
+    st.markdown("# 🤖 RAG-MCP Assistant")
+    st.markdown("---")
+    
+    # Stats Section
+    st.markdown("### 📊 Session Stats")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(get_metric_card_html("Queries", str(st.session_state.query_count), "💬"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(get_metric_card_html("Tools", str(len(set(st.session_state.tools_used))), "🔧"), unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # System Info
+    st.markdown("### ⚙️ System Info")
+    st.markdown(SYSTEM_INFO_HTML, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Quick Actions
+    st.markdown("### ⚡ Quick Actions")
+    
+    st.button("🔄 Clear Chat", on_click=clear_chat, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # Sample Queries
+    st.markdown("### 💡 Try These")
+    sample_queries = [
+        "What holidays are coming up?",
+        "Who works in Engineering?",
+        "What's the sick leave policy?",
+        "Search for John",
+        "Team events in 2025?"
+    ]
+    
+    for query in sample_queries:
+        st.button(query, key=f"sample_{query}", on_click=queue_query, args=(query,), use_container_width=True)
+
+
+# Main Content Area
+st.markdown("# 🎓 RAG-MCP Intelligent Assistant")
+st.markdown("### Ask me anything about employees, policies, or announcements!")
+
+# Initialize orchestrator if not done
+if st.session_state.orchestrator is None:
+    initialize_orchestrator()
+
+# Tabs for different sections
+tab1, tab2, tab3 = st.tabs(["💬 Chat", "🔍 System Details", "📈 Analytics"])
+
+with tab1:
+    chat_tab()
+
 with tab2:
     # System Details
     st.markdown("## 🏗️ System Architecture")
@@ -257,73 +456,18 @@ with tab2:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.markdown("""
-        <div class="glass-card">
-            <h3>💾 Database Server</h3>
-            <p><strong>Purpose:</strong> Employee records</p>
-            <p><strong>Storage:</strong> SQLite</p>
-            <p><strong>Tools:</strong> 4</p>
-            <ul>
-                <li>get_employee</li>
-                <li>search_employees</li>
-                <li>get_by_department</li>
-                <li>get_all_employees</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(DATABASE_SERVER_CARD_HTML, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
-        <div class="glass-card">
-            <h3>📁 Filesystem Server</h3>
-            <p><strong>Purpose:</strong> Announcements</p>
-            <p><strong>Storage:</strong> Text files</p>
-            <p><strong>Tools:</strong> 3</p>
-            <ul>
-                <li>list_announcements</li>
-                <li>read_announcement</li>
-                <li>search_announcements</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(FILESYSTEM_SERVER_CARD_HTML, unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
-        <div class="glass-card">
-            <h3>🧠 RAG Server</h3>
-            <p><strong>Purpose:</strong> Policy docs</p>
-            <p><strong>Storage:</strong> ChromaDB</p>
-            <p><strong>Tools:</strong> 2</p>
-            <ul>
-                <li>query_policies</li>
-                <li>get_policy_summary</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(RAG_SERVER_CARD_HTML, unsafe_allow_html=True)
     
     st.markdown("---")
     
     st.markdown("## 🎼 Orchestration Flow")
-    st.markdown("""
-    <div class="glass-card">
-        <pre>
-User Query
-    ↓
-Groq LLM (llama-3.3-70b-versatile)
-    ↓
-Function Calling & Tool Selection
-    ↓
-┌──────────────┬─────────────────┬──────────────┐
-│   Database   │   Filesystem    │     RAG      │
-│  MCP Server  │   MCP Server    │  MCP Server  │
-└──────────────┴─────────────────┴──────────────┘
-    ↓
-Results Aggregation
-    ↓
-Natural Language Response
-        </pre>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ORCHESTRATION_FLOW_HTML, unsafe_allow_html=True)
 
 with tab3:
     # Analytics
@@ -350,24 +494,11 @@ with tab3:
         # Query History
         st.markdown("### 📜 Query History")
         
-        if st.session_state.messages:
-            for i, msg in enumerate(reversed(st.session_state.messages)):
-                if msg["role"] == "user":
-                    with st.expander(f"Query {st.session_state.query_count - i//2}: {msg['content'][:50]}..."):
-                        st.markdown(f"**Question:** {msg['content']}")
-                        # Find corresponding response
-                        if i > 0:
-                            response = st.session_state.messages[-(i)]
-                            if response["role"] == "assistant":
-                                st.markdown(f"**Answer:** {response['content'][:200]}...")
+        render_query_history()
     else:
         st.info("📊 Analytics will appear after you start chatting!")
 
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #808080; font-size: 0.9rem;">
-    Made with ❤️ using RAG + MCP • Powered by Groq (llama-3.3-70b-versatile)
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
\ No newline at end of file
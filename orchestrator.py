@@ -1,10 +1,26 @@
 import asyncio
+import inspect
 import json
-from typing import Any, Dict, List
-from groq import Groq
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from groq import AsyncGroq, DefaultAsyncHttpxClient
 import os
 import sys
 
+# orjson is optional - it encodes tool results several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# diskcache is optional - it keeps results of read-only tools across restarts
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
@@ -14,249 +30,448 @@ from mcp_servers.filesystem_server import FilesystemMCPServer
 from mcp_servers.rag_server import RAGServer
 
 
+def _json_default(obj: Any) -> Any:
+    """Convert numpy values (e.g. ChromaDB scores) for the json module."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result to compact JSON."""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS writes int keys as strings, like json.dumps does
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), default=_json_default)
+
+
+def _loads(data: str) -> Any:
+    """Parse tool call arguments."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# MCP servers are created once per process and shared by every orchestrator,
+# so the SQLite handle, ChromaDB collection and embedding model load only once
+@lru_cache(maxsize=1)
+def _get_db_server() -> DatabaseMCPServer:
+    return DatabaseMCPServer()
+
+
+@lru_cache(maxsize=1)
+def _get_filesystem_server() -> FilesystemMCPServer:
+    return FilesystemMCPServer()
+
+
+@lru_cache(maxsize=1)
+def _get_rag_server() -> RAGServer:
+    return RAGServer()
+
+
+# Tool result cache - only policy and announcement tools are cached. Employee
+# tools always query the database, since setup_database.py can reseed it while
+# cached entries would survive for TOOL_CACHE_TTL (and across restarts)
+TOOL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mcp_cache")
+TOOL_CACHE_SIZE_LIMIT = 256 * 1024 * 1024
+TOOL_CACHE_TTL = 3600
+CACHEABLE_TOOLS = {
+    "search_policies",
+    "list_policies",
+    "list_announcements",
+    "read_announcement",
+}
+
+
+@lru_cache(maxsize=1)
+def _get_tool_cache() -> Optional["diskcache.Cache"]:
+    if diskcache is None:
+        return None
+    return diskcache.Cache(TOOL_CACHE_DIR, size_limit=TOOL_CACHE_SIZE_LIMIT)
+
+
+# System prompt - kept constant so every request starts with the same prefix
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are a helpful and confident HR assistant with direct access to:
+
+1. **Employee Database**: Employee information, departments, contact details
+2. **Announcements**: Company announcements, holidays, team events, policy updates
+3. **Policy Documents**: HR policies (leave policy, salary policy, etc.)
+
+Your behavior:
+- Provide direct, accurate answers using the tools available
+- Be concise and professional
+- Format lists clearly with line breaks between items for better readability
+
+Be confident and helpful."""
+}
+
+
+# Tool registry - JSON schema of every tool exposed by the MCP servers
+TOOLS_SCHEMA: List[Dict[str, Any]] = [
+    # Database Server Tools (Employee Data)
+    {
+        "type": "function",
+        "function": {
+            "name": "get_employee",
+            "description": "Get detailed information about an employee by ID",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "employee_id": {
+                        "type": "integer",
+                        "description": "The employee ID number"
+                    }
+                },
+                "required": ["employee_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_employees",
+            "description": "Search for employees by name (partial match)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Name or partial name to search for"
+                    }
+                },
+                "required": ["name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_employees_by_department",
+            "description": "Get all employees in a specific department",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "department": {
+                        "type": "string",
+                        "description": "Department name (e.g., 'Engineering', 'HR', 'Sales')"
+                    }
+                },
+                "required": ["department"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_all_employees",
+            "description": "Get a list of all employees in the database",
+            "parameters": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    },
+    
+    # Filesystem Server Tools (Announcements)
+    {
+        "type": "function",
+        "function": {
+            "name": "list_announcements",
+            "description": "List all available announcement files",
+            "parameters": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_announcement",
+            "description": "Read the full content of a specific announcement file",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "filename": {
+                        "type": "string",
+                        "description": "Name of the announcement file (e.g., 'holiday_2024.txt')"
+                    }
+                },
+                "required": ["filename"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_announcements",
+            "description": "Search announcements by keyword",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "keyword": {
+                        "type": "string",
+                        "description": "Keyword to search for in announcements"
+                    }
+                },
+                "required": ["keyword"]
+            }
+        }
+    },
+    
+    # RAG Server Tools (Policy Documents)
+    {
+        "type": "function",
+        "function": {
+            "name": "search_policies",
+            "description": "Search policy documents. Use this for questions about leave policy, salary policy, or other HR policies.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Natural language question about policies"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_policies",
+            "description": "List all available policy documents",
+            "parameters": {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    }
+]
+
+
+# Listing tools whose result is formatted directly, without a second LLM call
+LISTING_TOOLS = {
+    "list_policies": "Available policy documents:",
+    "list_announcements": "Available announcements:",
+}
+
+
+def _format_listing(title: str, result: Any) -> Optional[str]:
+    """Format a listing tool result as a bullet list, if it is a plain list of names."""
+    if isinstance(result, dict) and "error" not in result:
+        result = next((value for value in result.values() if isinstance(value, list)), None)
+    if not isinstance(result, list) or not result or not all(isinstance(item, str) for item in result):
+        return None
+    return title + "\n\n" + "\n".join(f"- {item}" for item in result)
+
+
+# Tool filtering - only the TOOL_TOP_K tools closest to the query are sent to
+# the LLM, unless no tool reaches TOOL_MIN_SIMILARITY (then all are sent)
+TOOL_TOP_K = 4
+TOOL_MIN_SIMILARITY = 0.3
+
+
 class CollegeAssistantOrchestrator:
     """
     Orchestrator that uses Groq LLM to intelligently route queries
     to Database, Filesystem, and RAG MCP servers.
     """
     
-    def __init__(self, groq_api_key: str):
-        self.groq_client = Groq(api_key=groq_api_key)
+    def __init__(self, groq_api_key: str, history_window: int = 16):
+        # Async client, so LLM calls don't block the event loop; its connection
+        # pool keeps connections to the Groq API alive between queries
+        self.groq_client = AsyncGroq(
+            api_key=groq_api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60
+                )
+            )
+        )
+        
+        # Number of recent turns (user + assistant message pairs) kept after
+        # the history is trimmed
+        self.history_window = history_window
         
         # Initialize all MCP servers
         print("🔧 Initializing MCP servers...")
-        self.db_server = DatabaseMCPServer()
-        self.filesystem_server = FilesystemMCPServer()
-        self.rag_server = RAGServer()
+        self.db_server = _get_db_server()
+        self.filesystem_server = _get_filesystem_server()
+        self.rag_server = _get_rag_server()
+        self._tool_cache = _get_tool_cache()
         
         # Tool registry
-        self.tools = self._build_tool_registry()
+        self.tools = TOOLS_SCHEMA
+        self._tool_embeddings = self._embed_tool_descriptions()
         
-        # Conversation history
-        self.conversation_history = []
+        # Tool dispatch: tool name -> MCP server method and its argument names
+        self._dispatch = {
+            # Database Server Tools
+            "get_employee": self.db_server.get_employee,
+            "search_employees": self.db_server.search_employees,
+            "get_employees_by_department": self.db_server.get_employees_by_department,
+            "get_all_employees": self.db_server.get_all_employees,
+            
+            # Filesystem Server Tools
+            "list_announcements": self.filesystem_server.list_announcements,
+            "read_announcement": self.filesystem_server.read_announcement,
+            "search_announcements": self.filesystem_server.search_announcements,
+            
+            # RAG Server Tools - synchronous, so run them in a worker thread
+            # to keep the event loop free for the other tool calls
+            "search_policies": partial(asyncio.to_thread, self.rag_server.search_policies),
+            "list_policies": partial(asyncio.to_thread, self.rag_server.list_policies),
+        }
+        self._arg_keys = {
+            "get_employee": ("employee_id",),
+            "search_employees": ("name",),
+            "get_employees_by_department": ("department",),
+            "get_all_employees": (),
+            "list_announcements": (),
+            "read_announcement": ("filename",),
+            "search_announcements": ("keyword",),
+            "search_policies": ("query",),
+            "list_policies": (),
+        }
         
         print(f"✅ Loaded {len(self.tools)} tools from 3 MCP servers")
         
-    def _build_tool_registry(self) -> List[Dict[str, Any]]:
-        """Build a registry of all available tools from MCP servers."""
-        return [
-            # Database Server Tools (Employee Data)
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_employee",
-                    "description": "Get detailed information about an employee by ID",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "employee_id": {
-                                "type": "integer",
-                                "description": "The employee ID number"
-                            }
-                        },
-                        "required": ["employee_id"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_employees",
-                    "description": "Search for employees by name (partial match)",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "name": {
-                                "type": "string",
-                                "description": "Name or partial name to search for"
-                            }
-                        },
-                        "required": ["name"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_employees_by_department",
-                    "description": "Get all employees in a specific department",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "department": {
-                                "type": "string",
-                                "description": "Department name (e.g., 'Engineering', 'HR', 'Sales')"
-                            }
-                        },
-                        "required": ["department"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_all_employees",
-                    "description": "Get a list of all employees in the database",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                }
-            },
-            
-            # Filesystem Server Tools (Announcements)
-            {
-                "type": "function",
-                "function": {
-                    "name": "list_announcements",
-                    "description": "List all available announcement files",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "read_announcement",
-                    "description": "Read the full content of a specific announcement file",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "filename": {
-                                "type": "string",
-                                "description": "Name of the announcement file (e.g., 'holiday_2024.txt')"
-                            }
-                        },
-                        "required": ["filename"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_announcements",
-                    "description": "Search announcements by keyword",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "keyword": {
-                                "type": "string",
-                                "description": "Keyword to search for in announcements"
-                            }
-                        },
-                        "required": ["keyword"]
-                    }
-                }
-            },
-            
-            # RAG Server Tools (Policy Documents)
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_policies",
-                    "description": "Search policy documents. Use this for questions about leave policy, salary policy, or other HR policies.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "Natural language question about policies"
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "list_policies",
-                    "description": "List all available policy documents",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                }
-            }
-        ]
+    def _embed_tool_descriptions(self) -> Optional[np.ndarray]:
+        """Embed tool descriptions with the RAG server's embedding model."""
+        embeddings = getattr(self.rag_server, "embeddings", None)
+        if embeddings is None:
+            return None
+        
+        vectors = np.array(embeddings.embed_documents(
+            [tool["function"]["description"] for tool in self.tools]
+        ))
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    def _select_tools(self, user_query: str) -> List[Dict[str, Any]]:
+        """Pick the tools whose descriptions are closest to the query."""
+        if self._tool_embeddings is None:
+            return self.tools
+        
+        query_vector = np.array(self.rag_server.embeddings.embed_query(user_query))
+        scores = self._tool_embeddings @ (query_vector / np.linalg.norm(query_vector))
+        if scores.max() < TOOL_MIN_SIMILARITY:
+            return self.tools
+        
+        # Keep the registry order so the same tools produce the same prompt
+        top = sorted(np.argsort(scores)[::-1][:TOOL_TOP_K])
+        return [self.tools[i] for i in top]
     
     async def _execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool by routing to the appropriate MCP server."""
         
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
+            return {"error": f"Unknown tool: {tool_name}"}
+        
+        cacheable = self._tool_cache is not None and tool_name in CACHEABLE_TOOLS
+        if cacheable:
+            cache_key = (tool_name, tuple(sorted(arguments.items())))
+            # diskcache is backed by SQLite, so keep its I/O off the event loop
+            cached = await asyncio.to_thread(self._tool_cache.get, cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            # Database Server Tools
-            if tool_name == "get_employee":
-                return await self.db_server.get_employee(arguments["employee_id"])
-            elif tool_name == "search_employees":
-                return await self.db_server.search_employees(arguments["name"])
-            elif tool_name == "get_employees_by_department":
-                return await self.db_server.get_employees_by_department(arguments["department"])
-            elif tool_name == "get_all_employees":
-                return await self.db_server.get_all_employees()
-            
-            # Filesystem Server Tools
-            elif tool_name == "list_announcements":
-                return await self.filesystem_server.list_announcements()
-            elif tool_name == "read_announcement":
-                return await self.filesystem_server.read_announcement(arguments["filename"])
-            elif tool_name == "search_announcements":
-                return await self.filesystem_server.search_announcements(arguments["keyword"])
-            
-            # RAG Server Tools
-            elif tool_name == "search_policies":
-                return self.rag_server.search_policies(arguments["query"])
-            elif tool_name == "list_policies":
-                return self.rag_server.list_policies()
-            
-            else:
-                return {"error": f"Unknown tool: {tool_name}"}
+            result = handler(*[arguments[key] for key in self._arg_keys[tool_name]])
+            if inspect.isawaitable(result):
+                result = await result
                 
         except Exception as e:
             return {"error": f"Tool execution failed: {str(e)}"}
+        
+        if cacheable and not (isinstance(result, dict) and "error" in result):
+            await asyncio.to_thread(self._tool_cache.set, cache_key, result, expire=TOOL_CACHE_TTL)
+        return result
+    
+    async def _execute_tools_concurrently(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Execute tool calls concurrently and return their results in call order.
+        A call that raised is returned as its exception.
+        
+        Each call still goes to its server on its own; merging same-server
+        calls (e.g. several get_employee lookups) into one query is deferred
+        until the database server offers a batch lookup.
+        """
+        return await asyncio.gather(
+            *(self._execute_tool(name, arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
     
-    async def process_query(self, user_query: str, verbose: bool = True) -> str:
+    def trim_history(self, history: List[Dict[str, Any]]):
         """
-        Process a user query using Groq LLM to orchestrate MCP servers.
+        Drop the oldest turns once history exceeds 4 * history_window messages,
+        keeping about the last history_window turns (2 * history_window
+        messages).
+        
+        Trimming happens in one cut rather than one turn at a time, so the
+        prompt prefix stays stable (and cacheable) between cuts. The cut is
+        always made in front of a user message, which keeps each assistant
+        tool call together with its tool results.
+        """
+        keep = 2 * self.history_window
+        if len(history) <= 2 * keep:
+            return
+        
+        start = len(history) - keep
+        while start > 0 and history[start]["role"] != "user":
+            start -= 1
+        del history[:start]
+    
+    async def stream_query(
+        self,
+        user_query: str,
+        history: List[Dict[str, Any]],
+        verbose: bool = True,
+        tools_used: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a user query using Groq LLM to orchestrate MCP servers,
+        yielding the final answer in chunks as the LLM generates it.
+        
+        If tools_used is given, the names of the tools called for this query
+        are appended to it.
+        
+        The conversation history is owned by the caller and extended in place,
+        so a single orchestrator can be shared between sessions.
+        
+        History is append-only: earlier turns are never rewritten, reordered
+        or summarized. Every request therefore starts with the same prefix
+        ([SYSTEM_MESSAGE] + earlier turns) as the previous one, which lets the
+        provider reuse its prompt cache instead of re-processing those tokens.
+        The only exception is trim_history(), which drops the oldest turns
+        once the history gets too long. To start over, callers should replace
+        the list with a new one rather than editing it.
         """
         # Add user message to history
-        self.conversation_history.append({
+        history.append({
             "role": "user",
             "content": user_query
         })
         
-        # System prompt
-        system_message = {
-            "role": "system",
-            "content": """You are a helpful and confident HR assistant with direct access to:
-
-1. **Employee Database**: Employee information, departments, contact details
-2. **Announcements**: Company announcements, holidays, team events, policy updates
-3. **Policy Documents**: HR policies (leave policy, salary policy, etc.)
-
-Your behavior:
-- Provide direct, accurate answers using the tools available
-- Be concise and professional
-- Format lists clearly with line breaks between items for better readability
-
-Be confident and helpful."""
-        }
-        
-        # Prepare messages for Groq
-        messages = [system_message] + self.conversation_history
+        # Prepare messages and relevant tools for Groq
+        messages = [SYSTEM_MESSAGE] + history
+        tools = await asyncio.to_thread(self._select_tools, user_query)
         
         if verbose:
             print("\n🤔 Thinking...")
         
         # First LLM call to determine which tools to use
-        response = self.groq_client.chat.completions.create(
+        response = await self.groq_client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=messages,
-            tools=self.tools,
+            tools=tools,
             tool_choice="auto",
             max_tokens=4096
         )
@@ -264,77 +479,110 @@ Be confident and helpful."""
         response_message = response.choices[0].message
         tool_calls = response_message.tool_calls
         
+        if tool_calls and tools_used is not None:
+            tools_used.extend(tc.function.name for tc in tool_calls)
+        
         # If no tools needed, return direct response
         if not tool_calls:
             assistant_message = response_message.content
-            self.conversation_history.append({
+            history.append({
                 "role": "assistant",
                 "content": assistant_message
             })
-            return assistant_message
+            self.trim_history(history)
+            yield assistant_message or ""
+            return
         
         # Execute all tool calls
-        self.conversation_history.append({
+        history.append({
             "role": "assistant",
             "content": response_message.content or "",
-            "tool_calls": [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    }
-                }
-                for tc in tool_calls
-            ]
+            "tool_calls": [tc.model_dump(exclude_none=True) for tc in tool_calls]
         })
         
-        # Execute each tool call
+        # Execute all tool calls concurrently - they are independent I/O waits
+        calls = []
         for tool_call in tool_calls:
             function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
+            function_args = _loads(tool_call.function.arguments)
+
             if verbose:
                 print(f"🔧 Using: {function_name}({json.dumps(function_args, indent=2)})")
-            
-            # Execute the tool
-            tool_result = await self._execute_tool(function_name, function_args)
-            
+
+            calls.append((function_name, function_args))
+
+        results = await self._execute_tools_concurrently(calls)
+
+        # Add tool responses to history in the original call order
+        for tool_call, tool_result in zip(tool_calls, results):
+            if isinstance(tool_result, Exception):
+                tool_result = {"error": f"Tool execution failed: {str(tool_result)}"}
+
+            # Every tool call needs a reply, even if its result can't be encoded
+            try:
+                content = _dumps(tool_result)
+            except (TypeError, ValueError) as e:
+                content = _dumps({"error": f"Tool result could not be encoded: {str(e)}"})
+
             if verbose:
-                print(f"✅ Got result from {function_name}")
-            
-            # Add tool response to history
-            self.conversation_history.append({
+                print(f"✅ Got result from {tool_call.function.name}")
+
+            history.append({
                 "role": "tool",
                 "tool_call_id": tool_call.id,
-                "content": json.dumps(tool_result)
+                "content": content
             })
         
+        # A single listing tool needs no LLM to phrase its answer
+        if len(tool_calls) == 1 and tool_calls[0].function.name in LISTING_TOOLS:
+            listing = _format_listing(LISTING_TOOLS[tool_calls[0].function.name], results[0])
+            if listing is not None:
+                history.append({
+                    "role": "assistant",
+                    "content": listing
+                })
+                self.trim_history(history)
+                yield listing
+                return
+        
         # Second LLM call to generate final response
         if verbose:
             print("💭 Generating response...")
             
-        final_response = self.groq_client.chat.completions.create(
+        final_response = await self.groq_client.chat.completions.create(
             model="llama-3.3-70b-versatile",
-            messages=[system_message] + self.conversation_history,
-            max_tokens=4096
+            messages=[SYSTEM_MESSAGE] + history,
+            max_tokens=4096,
+            stream=True
         )
         
-        final_message = final_response.choices[0].message.content
+        # Yield tokens as they arrive instead of waiting for the full answer
+        chunks = []
+        async for chunk in final_response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                chunks.append(delta)
+                yield delta
+        
+        final_message = "".join(chunks)
         
         # Add to history
-        self.conversation_history.append({
+        history.append({
             "role": "assistant",
             "content": final_message
         })
-        
-        return final_message
+        self.trim_history(history)
     
-    def reset_conversation(self):
-        """Clear conversation history."""
-        self.conversation_history = []
-        print("🔄 Conversation history cleared")
+    async def process_query(
+        self, user_query: str, history: List[Dict[str, Any]], verbose: bool = True
+    ) -> Tuple[str, List[str]]:
+        """
+        Process a user query and return the complete final answer together
+        with the names of the tools used to produce it.
+        """
+        tools_used = []
+        chunks = [chunk async for chunk in self.stream_query(user_query, history, verbose, tools_used)]
+        return "".join(chunks), tools_used
 
 
 async def main():
@@ -357,6 +605,9 @@ async def main():
         print(f"❌ Failed to initialize orchestrator: {e}")
         return
     
+    # Conversation history
+    history = []
+    
     # Demo queries
     demo_queries = [
         "What are the recent announcements?",
@@ -373,7 +624,7 @@ async def main():
         print('='*60)
         
         try:
-            response = await orchestrator.process_query(query)
+            response, _ = await orchestrator.process_query(query, history)
             print(f"\n💬 Response:\n{response}\n")
         except Exception as e:
             print(f"❌ Error processing query: {e}")
@@ -399,13 +650,14 @@ async def main():
                 break
             
             if user_input.lower() == 'reset':
-                orchestrator.reset_conversation()
+                history = []
+                print("🔄 Conversation history cleared")
                 continue
             
             if not user_input:
                 continue
             
-            response = await orchestrator.process_query(user_input)
+            response, _ = await orchestrator.process_query(user_input, history)
             print(f"\n💬 Assistant: {response}")
             
         except KeyboardInterrupt:
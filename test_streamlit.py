@@ -5,9 +5,14 @@ import os
 
 st.title("Test")
 
-if "orch" not in st.session_state:
-    api_key = os.getenv("GROQ_API_KEY")
-    st.session_state.orch = CollegeAssistantOrchestrator(api_key)
-    st.success("Loaded!")
+
+@st.cache_resource
+def get_orchestrator(api_key: str) -> CollegeAssistantOrchestrator:
+    """Create one orchestrator, and so one set of MCP servers, per process."""
+    return CollegeAssistantOrchestrator(api_key)
+
+
+orch = get_orchestrator(os.getenv("GROQ_API_KEY"))
+st.success("Loaded!")
 
 st.write("If you see this, it works!")
\ No newline at end of file